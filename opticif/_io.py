@@ -0,0 +1,9 @@
+"""This module provides the buffer and block sizes shared by the file reading and writing functions of the package."""
+
+# Buffer size used for reading and writing files throughout the package, large enough to hand the OS few large reads
+# and writes instead of many small ones
+_IO_BUFFER_SIZE = 1 << 20
+
+# Number of matrix elements processed at once when validating a matrix or converting it to edges, which bounds the size
+# of the temporary arrays created per block
+_MATRIX_BLOCK_SIZE = 1 << 20
@@ -3,10 +3,18 @@ and DSM matrix conversion processes.
 """
 
 import csv
+import io
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from sys import intern
+from typing import List, Optional, Tuple, Union
 
+import numpy as np
 from scipy.io import loadmat
+from scipy.sparse import csr_matrix, issparse
+
+from opticif._io import _IO_BUFFER_SIZE, _MATRIX_BLOCK_SIZE
 
 
 class CSVStructureError(Exception):
@@ -38,40 +46,114 @@ def validate_node_csv_structure(
         or contains empty values.
         CSVGroupingError: If a 'labels' column is present and nodes with the same label are not grouped together.
     """
+    read_and_validate_node_csv(csv_path, csv_delimiter)
+
+
+def read_and_validate_node_csv(
+    csv_path: Union[str, Path], csv_delimiter: str = ";"
+) -> Tuple[List[str], Optional[List[str]]]:
+    """
+    Reads the node names and, if present, the labels from a node CSV file, validating its structure in the same pass.
+    See validate_node_csv_structure for the checks performed.
+
+    Args:
+        csv_path (Union[str, Path]): The path to the node CSV file to read.
+        csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
+
+    Returns:
+        Tuple[List[str], Optional[List[str]]]: The node names in file order, and their labels if the file has a
+        'labels' column, otherwise None. Each call returns new lists, which the caller is free to modify.
+
+    Raises:
+        CSVStructureError: If the node CSV file does not contain a 'name' column, contains duplicate names,
+        or contains empty values.
+        CSVGroupingError: If a 'labels' column is present and nodes with the same label are not grouped together.
+    """
+    # Parsed files are cached by path, modification time, size and delimiter, so pipelines that read the same node
+    # file repeatedly parse it only once, while edits to the file are still picked up. The cached error messages leave
+    # out the path, which is added here as given by the caller.
+    resolved_path = Path(csv_path).resolve()
+    stat = resolved_path.stat()
+    try:
+        names, labels = _read_and_validate_node_csv_cached(
+            str(resolved_path), stat.st_mtime_ns, stat.st_size, csv_delimiter
+        )
+    except (CSVStructureError, CSVGroupingError) as error:
+        raise type(error)(f"'{csv_path}' {error}") from None
+    return list(names), list(labels) if labels is not None else None
+
+
+@lru_cache(maxsize=32)
+def _read_and_validate_node_csv_cached(
+    csv_path: str, mtime_ns: int, size: int, csv_delimiter: str
+) -> Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]]:
+    """
+    Reads and validates a node CSV file. The modification time and size are only part of the cache key. The names and
+    labels are returned as tuples, so the cached values cannot be modified by callers.
+    """
     # Check if the CSV file contains a 'name' column
-    with open(csv_path, "r") as f:
-        reader = csv.DictReader(f, delimiter=csv_delimiter)
-        if "name" not in reader.fieldnames:
-            raise CSVStructureError(
-                f"'{csv_path}' should have a header with a 'name' column."
-            )
+    with open(csv_path, "r", buffering=_IO_BUFFER_SIZE) as f:
+        reader = csv.reader(f, delimiter=csv_delimiter)
+        header = next(reader, [])
+        if "name" not in header:
+            raise CSVStructureError("should have a header with a 'name' column.")
 
-        rows = list(reader)
-        if "labels" in reader.fieldnames:
-            last_label = None
-            for row in rows:
-                if (
-                    last_label is not None
-                    and last_label != row["labels"]
-                    and last_label != ""
-                    and any(r["labels"] == last_label for r in rows[rows.index(row) :])
-                ):
-                    raise CSVGroupingError(
-                        f"'{csv_path}' should group nodes of the same label together. OptiCIF does not yet support "
-                        f"nodes with more than one label."
-                    )
-                last_label = row["labels"]
-
-        # Check for duplicate and empty names
-        names = [row["name"] for row in rows]
-        if "" in names:
-            raise CSVStructureError(
-                f"'{csv_path}' should not have empty values in the 'name' column."
-            )
-        if len(names) != len(set(names)):
-            raise CSVStructureError(
-                f"'{csv_path}' should not have duplicate values in the 'name' column."
-            )
+        # Collect the name and label columns by index, skipping blank lines like csv.DictReader does. Names are
+        # interned, so dictionaries keyed by the same interned names elsewhere compare them by identity.
+        name_index = header.index("name")
+        label_index = header.index("labels") if "labels" in header else None
+        names = []
+        labels = []
+
+        # A file with only a 'name' column and no quotes, delimiters or carriage returns in its body holds one name per
+        # line, so split it directly instead of going through the csv parser. Text mode already turns CRLF line endings
+        # into '\n', the check for '\r' keeps the split correct should the file be read without newline translation.
+        if len(header) == 1:
+            body = f.read()
+            if '"' in body or "\r" in body or csv_delimiter in body:
+                reader = csv.reader(io.StringIO(body), delimiter=csv_delimiter)
+            else:
+                names = [intern(name) for name in body.split("\n") if name]
+                reader = ()
+
+        for row in reader:
+            if not row:
+                continue
+            names.append(intern(row[name_index]) if name_index < len(row) else "")
+            if label_index is not None:
+                labels.append(row[label_index] if label_index < len(row) else "")
+
+    if label_index is not None:
+        # Record the first and last index and the count of each non-empty label in a single pass. A label is
+        # grouped together if and only if its rows span exactly as many indices as there are rows with it.
+        first_index = {}
+        last_index = {}
+        label_count = Counter()
+        for i, label in enumerate(labels):
+            if label:
+                first_index.setdefault(label, i)
+                last_index[label] = i
+                label_count[label] += 1
+
+        for label, count in label_count.items():
+            if last_index[label] - first_index[label] + 1 != count:
+                raise CSVGroupingError(
+                    "should group nodes of the same label together. OptiCIF does not yet support "
+                    "nodes with more than one label."
+                )
+
+    # Check for duplicate and empty names, counting the names in a single pass
+    name_count = Counter(names)
+    if "" in name_count:
+        raise CSVStructureError("should not have empty values in the 'name' column.")
+    duplicates = [name for name, count in name_count.items() if count > 1]
+    if duplicates:
+        raise CSVStructureError(
+            "should not have duplicate values in the 'name' column. Found duplicates: "
+            f"{', '.join(duplicates[:5])}{', ...' if len(duplicates) > 5 else ''}"
+        )
+
+    return tuple(names), tuple(labels) if label_index is not None else None
 
 
 def validate_matrix_file_structure(matrix_path: Union[str, Path]) -> None:
@@ -84,20 +166,102 @@ def validate_matrix_file_structure(matrix_path: Union[str, Path]) -> None:
     Raises:
         MATStructureError: If the matrix file is not square, is not binary or has any formatting issues.
     """
-    mat_data = loadmat(matrix_path)
-    matrix = mat_data[list(mat_data.keys())[-1]]
+    matrix = load_matrix(matrix_path)
 
-    row_count = len(matrix)
+    if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+        raise MATStructureError(
+            f"The matrix in '{matrix_path}' is not square. Each row should have the same number of elements as "
+            f"the number of rows."
+        )
 
-    for i, row in enumerate(matrix):
-        if len(row) != row_count:
+    # Only the stored elements of a sparse matrix can be non-binary. The matrix is in canonical CSR form, so the first
+    # stored non-binary element is also the first one in row-major order.
+    if issparse(matrix):
+        non_binary = np.flatnonzero((matrix.data != 0) & (matrix.data != 1))
+        if non_binary.size:
+            k = non_binary[0]
+            i = np.searchsorted(matrix.indptr, k, side="right") - 1
+            j = matrix.indices[k]
             raise MATStructureError(
-                f"The matrix in '{matrix_path}' is not square. Each row should have the same number of elements as "
-                f"the number of rows."
+                f"The matrix in '{matrix_path}' is not binary. Found '{matrix.data[k]}' at row {i + 1}, column "
+                f"{j + 1}."
             )
+        return
 
-        for j, element in enumerate(row):
-            if element not in [0, 1]:
-                raise MATStructureError(
-                    f"The matrix in '{matrix_path}' is not binary. Found '{element}' at row {i + 1}, column {j + 1}."
-                )
+    # A boolean matrix only holds 0s and 1s
+    if matrix.dtype == np.bool_:
+        return
+
+    # Locate non-binary elements with vectorized passes over the matrix, checked in blocks of rows, so the temporary
+    # arrays stay bounded in size and the check stops at the first block containing a non-binary element. Integer
+    # matrices are cast to uint8, which is free for uint8 matrices; elements that do not survive the cast unchanged are
+    # not binary either. Floating-point matrices, which loadmat returns for MATLAB doubles, are compared against 0 and 1
+    # directly, which also flags fractions and NaN without copying the block first.
+    is_integer = np.issubdtype(matrix.dtype, np.integer)
+    block_rows = max(1, _MATRIX_BLOCK_SIZE // max(1, matrix.shape[1]))
+    for start in range(0, matrix.shape[0], block_rows):
+        block = matrix[start : start + block_rows]
+        if is_integer:
+            binary = block.astype(np.uint8, copy=False)
+            non_binary = binary > 1
+            if binary is not block:
+                non_binary |= binary != block
+        else:
+            non_binary = (block != 0) & (block != 1)
+        if non_binary.any():
+            i, j = np.argwhere(non_binary)[0]
+            i += start
+            raise MATStructureError(
+                f"The matrix in '{matrix_path}' is not binary. Found '{matrix[i, j]}' at row {i + 1}, column {j + 1}."
+            )
+
+
+def load_matrix(matrix_path: Union[str, Path]) -> Union[np.ndarray, csr_matrix]:
+    """
+    Loads the matrix stored in a .mat file. The most recently loaded matrix is cached by path, modification time and
+    size, so validating and then converting the same file parses it only once, while edits to the file are still
+    picked up. Only one matrix is kept alive by the cache.
+
+    Matrices stored as sparse in the .mat file are kept sparse, in canonical CSR form, so their zero elements are
+    never materialized or visited.
+
+    Args:
+        matrix_path (Union[str, Path]): The path to the .mat file containing the matrix.
+
+    Returns:
+        Union[np.ndarray, csr_matrix]: The matrix, as a read-only array or sparse matrix shared between callers.
+
+    Raises:
+        MATStructureError: If the .mat file does not contain any variable.
+    """
+    matrix_path = Path(matrix_path).resolve()
+    stat = matrix_path.stat()
+    return _load_matrix_cached(str(matrix_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1)
+def _load_matrix_cached(
+    matrix_path: str, mtime_ns: int, size: int
+) -> Union[np.ndarray, csr_matrix]:
+    """
+    Loads the matrix stored in a .mat file. The modification time and size are only part of the cache key.
+    """
+    # Use the last variable stored in the file, skipping the '__header__', '__version__' and '__globals__' metadata
+    # entries added by loadmat
+    mat_data = loadmat(matrix_path)
+    variable_name = next(
+        (key for key in reversed(mat_data) if not key.startswith("__")), None
+    )
+    if variable_name is None:
+        raise MATStructureError(f"'{matrix_path}' does not contain a matrix.")
+    matrix = mat_data[variable_name]
+    if issparse(matrix):
+        matrix = csr_matrix(matrix)
+        matrix.sum_duplicates()  # Also sorts the indices
+        for array in (matrix.data, matrix.indices, matrix.indptr):
+            array.flags.writeable = False
+        return matrix
+
+    matrix = np.asarray(matrix)
+    matrix.flags.writeable = False
+    return matrix
@@ -1,11 +1,17 @@
 """This module provides functionality for global optimization on CIF specifications."""
 
-import csv
 import re
+from itertools import chain
 from pathlib import Path
-from typing import Union, List, Tuple, Optional, Dict
+from sys import intern
+from typing import Union, List, Tuple, Optional, Dict, Iterable, Iterator
 
-from opticif._validators import validate_node_csv_structure
+from opticif._io import _IO_BUFFER_SIZE
+from opticif._validators import read_and_validate_node_csv
+
+# Matches the header of an explicit plant automaton declaration and captures its name. The name is looked up in a set
+# of node names afterwards, so the pattern stays the same size regardless of the length of the node sequence.
+_PLANT_AUTOMATON_HEADER_PATTERN = re.compile(r"^\s*plant\s+automaton\s+([^\s:]+)\s*:")
 
 
 def do_global_optimization(
@@ -13,6 +19,7 @@ def do_global_optimization(
     cif_path: Union[str, Path],
     output_dir: Union[str, Path] = "generated",
     csv_delimiter: str = ";",
+    strict: bool = True,
 ) -> None:
     """
     Performs global optimization on a CIF specification by reordering explicit plant automaton declarations according
@@ -28,20 +35,31 @@ def do_global_optimization(
         output_dir (Union[str, Path]): The path to the directory where the output files will be saved.
                         Defaults to 'generated'.
         csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
+        strict (bool): If True, raises at the first duplicate plant automaton declaration of a node. If False, reads
+                        the whole specification first and then raises once, reporting every duplicate. Duplicates are
+                        never tolerated, False only delays the error. Defaults to True.
 
     Returns:
         None. The reordered CIF file is saved with '.seq' appended to the input file's name in the specified
         output directory.
+
+    Raises:
+        CSVStructureError: If the CSV file does not contain a 'name' column, contains duplicate names, or contains
+        empty values.
+        CSVGroupingError: If a 'labels' column is present and nodes with the same label are not grouped together.
+        ValueError: If a node has more than one plant automaton declaration in the CIF specification.
+        SyntaxError: If a plant automaton declaration of a node starts before the previous one is closed.
+        KeyError: If a node of the CSV file has no plant automaton declaration in the CIF specification.
     """
     # Convert to Path object
     output_dir = Path(output_dir)
     cif_path = Path(cif_path)
 
     # Read and validate CSV
-    node_sequence, label_sequence = _read_and_validate_csv(csv_path, csv_delimiter)
+    node_sequence, label_sequence = read_and_validate_node_csv(csv_path, csv_delimiter)
 
     # Read CIF file
-    items_dict, non_item_lines = _read_cif_file(cif_path, node_sequence)
+    items_dict, non_item_lines = _read_cif_file(cif_path, node_sequence, strict)
 
     # Reorder and group nodes
     output_lines = _reorder_and_group_nodes(items_dict, node_sequence, label_sequence)
@@ -50,83 +68,77 @@ def do_global_optimization(
     _write_reordered_nodes_to_cif(output_dir, cif_path, non_item_lines, output_lines)
 
 
-def _read_and_validate_csv(
-    csv_path: Union[str, Path], csv_delimiter: str = ";"
-) -> Tuple[List[str], Optional[List[str]]]:
-    """
-    Read the CSV file and get the sequence and labels. Also validates the CSV structure.
-    """
-    # Validate the CSV file structure
-    validate_node_csv_structure(csv_path, csv_delimiter)
-
-    # Read the CSV file and get the sequence and labels
-    with open(csv_path, "r") as f:
-        csv_reader = csv.DictReader(f, delimiter=csv_delimiter)
-        has_labels_column = "labels" in csv_reader.fieldnames
-        node_sequence = []
-        label_sequence = [] if has_labels_column else None
-        for row in csv_reader:
-            node_sequence.append(row["name"])
-            if has_labels_column:
-                label_sequence.append(row["labels"])
-
-    return node_sequence, label_sequence
-
-
 def _read_cif_file(
-    cif_path: Union[str, Path], node_sequence: List[str]
+    cif_path: Union[str, Path], node_sequence: List[str], strict: bool = True
 ) -> Tuple[Dict[str, List[str]], List[str]]:
     """
-    Read the CIF file and separate it into the relevant parts.
+    Read the CIF file and separate it into the relevant parts. Raises on the first duplicate declaration in strict
+    mode, or on all duplicates after the whole file has been read otherwise.
     """
-    # Prepare a regex pattern for matching node names
-    pattern = (
-        r"^\s*plant\s+automaton\s+("
-        + "|".join(re.escape(name) for name in node_sequence)
-        + r")\s*:"
-    )
-    node_name_pattern = re.compile(pattern)
-
-    # Read the CIF file
-    with open(cif_path, "r") as f:
-        cif_lines = f.readlines()
+    # Prepare a set of node names, looked up for every automaton header found
+    node_set = frozenset(node_sequence)
 
     # Initialize dictionaries and sets for tracking lines and duplicates
     items_dict = {}
     non_item_lines = []
     duplicates = set()
 
-    # Initialize variables for capturing multiline items
+    # Initialize variables for capturing multiline items. The same working list is reused for every item and copied
+    # once, at its exact size, when the item is complete.
     capturing_item = False
     node_name = None
     current_item_lines = []
 
-    # Iterate through CIF lines, separating target lines and non-target lines
-    for line in cif_lines:
-        # Skip empty lines and comments
-        if not line.strip() or line.strip().startswith("//"):
-            continue
-
-        match = node_name_pattern.match(line)
-        # If the line starts a new item
-        if match and not capturing_item:
-            node_name = match.group(1)
-            capturing_item = True
-            current_item_lines = [line]
-
-            # Check for duplicates
-            if node_name in items_dict:
-                duplicates.add(node_name)
-        elif match:  # If a new item starts while still capturing the previous one
-            raise SyntaxError("Unclosed automaton detected")
-        elif not capturing_item:  # If it's a non-target line
-            non_item_lines.append(line)
-        else:  # If it's part of the current item
-            current_item_lines.append(line)
-            # If item ends, store the captured lines and reset capturing state
-            if line.strip().split()[-1] == "end":
-                items_dict[node_name] = current_item_lines
-                capturing_item = False
+    # Bind the methods used for every line to local names to avoid repeated attribute lookups in the loop
+    match_header = _PLANT_AUTOMATON_HEADER_PATTERN.match
+    append_non_item_line = non_item_lines.append
+    append_item_line = current_item_lines.append
+
+    # Stream through the CIF lines, separating target lines and non-target lines. Only the lines themselves are kept,
+    # the file is never materialized as a whole.
+    with open(cif_path, "r", buffering=_IO_BUFFER_SIZE) as f:
+        for line in f:
+            # Skip empty lines and comments
+            stripped = line.strip()
+            if not stripped or stripped[:2] == "//":
+                continue
+
+            # Only lines starting with 'plant' can be automaton headers, reject all others without running the regex
+            match = match_header(stripped) if stripped[:5] == "plant" else None
+            if match and match.group(1) not in node_set:
+                match = None
+
+            # If the line starts a new item, key it by the interned name shared with the node sequence
+            if match and not capturing_item:
+                node_name = intern(match.group(1))
+                capturing_item = True
+                current_item_lines.clear()
+                append_item_line(line)
+
+                # Check for duplicates, failing immediately in strict mode
+                if node_name in items_dict:
+                    if strict:
+                        raise ValueError(
+                            f"Duplicate plant automaton declaration in the CIF specification: {node_name}"
+                        )
+                    duplicates.add(node_name)
+            elif match:  # If a new item starts while still capturing the previous one
+                raise SyntaxError("Unclosed automaton detected")
+            elif not capturing_item:  # If it's a non-target line
+                append_non_item_line(line)
+            else:  # If it's part of the current item
+                append_item_line(line)
+                # If item ends (its last word is 'end'), store the captured lines and reset capturing state
+                if stripped.endswith("end") and (
+                    len(stripped) == 3 or stripped[-4].isspace()
+                ):
+                    items_dict[node_name] = current_item_lines.copy()
+                    capturing_item = False
+
+    if duplicates:
+        raise ValueError(
+            f"Duplicate plant automaton declarations in the CIF specification: {', '.join(sorted(duplicates))}"
+        )
 
     return items_dict, non_item_lines
 
@@ -135,69 +147,80 @@ def _reorder_and_group_nodes(
     items_dict: Dict[str, List[str]],
     node_sequence: List[str],
     label_sequence: Optional[List[str]],
-) -> List[str]:
+) -> Iterator[str]:
     """
-    Reorder and group the nodes based on the input sequence and labels.
+    Reorder and group the nodes based on the input sequence and labels. Missing nodes are reported immediately, the
+    reordered lines are generated lazily while they are written.
     """
-    # Reorder the target lines according to the sequence
-    missing_nodes = set(node_sequence) - items_dict.keys()
-    if missing_nodes:
+    # Reorder the target lines according to the sequence. Every captured item is a node of the sequence and node names
+    # are unique, so nodes can only be missing if fewer items than nodes were captured.
+    if len(items_dict) < len(node_sequence):
+        missing_nodes = [name for name in node_sequence if name not in items_dict]
         raise KeyError(
             f"Nodes not found in the CIF specification: {', '.join(sorted(missing_nodes))}"
         )
 
-    output_lines = []
-    in_group = False  # Boolean flag to track whether we are currently in a group
+    # In case no labels are provided, chain the captured lines in sequence order without a Python-level loop
+    if not label_sequence:
+        return chain.from_iterable(map(items_dict.__getitem__, node_sequence))
+
+    return _generate_grouped_lines(items_dict, node_sequence, label_sequence)
+
 
-    if label_sequence:
-        last_label = None
-        for node_name, label in zip(node_sequence, label_sequence):
-            # If the label is not empty and has changed from the previous label, start a new group
-            if label and label != last_label:
-                if in_group:  # Close the previous group
-                    output_lines.append("end\n")
-                output_lines.append(f"group {label}:\n")
-                in_group = True
-
-            # If the current label is empty but the last label was not, close the previous group
-            elif not label and last_label:
-                output_lines.append("end\n")
-                in_group = False
-
-            # Add the node lines to the output, with indentation if it's in a group
-            if in_group:
-                output_lines.extend(["    " + line for line in items_dict[node_name]])
-            else:
-                output_lines.extend(items_dict[node_name])
-
-            last_label = label
-
-        # If the last node was in a group, close the group
+def _generate_grouped_lines(
+    items_dict: Dict[str, List[str]],
+    node_sequence: List[str],
+    label_sequence: List[str],
+) -> Iterator[str]:
+    """
+    Generate the lines of the reordered nodes grouped by their labels, without materializing them as a list.
+    """
+    in_group = False  # Boolean flag to track whether we are currently in a group
+    last_label = None
+    for node_name, label in zip(node_sequence, label_sequence):
+        # If the label is not empty and has changed from the previous label, start a new group
+        if label and label != last_label:
+            if in_group:  # Close the previous group
+                yield "end\n"
+            yield f"group {label}:\n"
+            in_group = True
+
+        # If the current label is empty but the last label was not, close the previous group
+        elif not label and last_label:
+            yield "end\n"
+            in_group = False
+
+        # Add the node lines to the output, with indentation if it's in a group. As every line but possibly the
+        # last one ends with a newline, the indented block is built with one join instead of a string per line.
         if in_group:
-            output_lines.append("end\n")
+            yield "    " + "    ".join(items_dict[node_name])
+        else:
+            yield from items_dict[node_name]
 
-    else:  # In case no labels are provided
-        for node_name in node_sequence:
-            output_lines.extend(items_dict[node_name])
+        last_label = label
 
-    return output_lines
+    # If the last node was in a group, close the group
+    if in_group:
+        yield "end\n"
 
 
 def _write_reordered_nodes_to_cif(
-    output_dir: Union[str, Path],
-    cif_path: Union[str, Path],
+    output_dir: Path,
+    cif_path: Path,
     non_item_lines: List[str],
-    output_lines: List[str],
+    output_lines: Iterable[str],
 ) -> None:
     """
     Write the reordered nodes back into the CIF file.
     """
-    # Create the output directory if it doesn't exist
-    generated_dir = Path(output_dir)
-    generated_dir.mkdir(exist_ok=True)
+    # Create the output directory, and any missing parents, if it doesn't exist
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     # Write the output lines to the output file
-    output_file = generated_dir / f"{cif_path.stem}.seq.cif"
+    output_file = output_dir / f"{cif_path.stem}.seq.cif"
 
-    with open(output_file, "w") as f:
-        f.writelines(non_item_lines + output_lines)
+    # Write the non-item lines with a single call, then stream the reordered lines straight from their generator so
+    # they are never held in memory as a whole
+    with open(output_file, "w", buffering=_IO_BUFFER_SIZE) as f:
+        f.write("".join(non_item_lines))
+        f.writelines(output_lines)
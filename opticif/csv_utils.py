@@ -3,13 +3,25 @@ conversion, and plant group sequence handling.
 """
 
 import csv
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Union
+from sys import intern
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 
+import numpy as np
 import scipy.io as sio
+from scipy.sparse import csr_matrix, issparse
 from ragraph.graph import Node
 
-from opticif import validate_node_csv_structure, validate_matrix_file_structure
+from opticif._io import _IO_BUFFER_SIZE, _MATRIX_BLOCK_SIZE
+from opticif._validators import (
+    load_matrix,
+    read_and_validate_node_csv,
+    validate_matrix_file_structure,
+)
+
+# Line terminator written by the csv writer, also used when CSV lines are formatted directly
+_CSV_LINE_TERMINATOR = csv.excel.lineterminator
 
 
 def node_to_csv(
@@ -34,17 +46,23 @@ def node_to_csv(
         None. The CSV file is saved with '.nodes.seq.csv' appended to the stem path in the specified output
         directory.
     """
-    # Extracting only the names of each node using list comprehension
-    node_names = [node.name for node in nodes]
-
     # Create the output directory if it doesn't exist
     generated_dir = _create_output_directory(output_dir)
 
     # Append "_nodes.csv" to the stem path to create the filename
     filename = generated_dir / f"{stem_path}.nodes.seq.csv"
 
-    # Writing the node names to a CSV file
-    _write_csv_file(filename, ["name"], [[name] for name in node_names], csv_delimiter)
+    # Writing the node names to a CSV file. If no name needs quoting, the names are joined into the file's lines with
+    # a single join, otherwise all rows are handed to the csv writer in one batch. An empty name is quoted by the csv
+    # writer when it is the only field of its row.
+    node_names = [node.name for node in nodes]
+    if "" in node_names or _needs_quoting(node_names, csv_delimiter):
+        _write_csv_file(
+            filename, ["name"], ([name] for name in node_names), csv_delimiter
+        )
+    else:
+        lines = [_CSV_LINE_TERMINATOR.join(node_names) + _CSV_LINE_TERMINATOR]
+        _write_csv_lines(filename, ["name"], lines if node_names else [], csv_delimiter)
 
 
 def mat_to_csv(
@@ -72,21 +90,17 @@ def mat_to_csv(
         None. The edge list in CSV format is saved with '.edges.csv' appended to the stem path in the specified output
         directory.
     """
-    # Validate the node CSV structure
-    validate_node_csv_structure(node_path, csv_delimiter)
-
-    # Read node names from the CSV file
-    nodes = [row["name"] for row in _read_csv_file(node_path, csv_delimiter)]
+    # Read the node names from the CSV file, validating its structure in the same pass
+    nodes, _ = read_and_validate_node_csv(node_path, csv_delimiter)
 
     # Validate the matrix file structure
     validate_matrix_file_structure(matrix_path)
 
-    # Read the matrix from the .mat file
-    mat_data = sio.loadmat(matrix_path)
-    matrix = mat_data[list(mat_data.keys())[-1]]
+    # Read the matrix from the .mat file, reusing the matrix parsed during validation
+    matrix = load_matrix(matrix_path)
 
     # Check if the length of both files matches
-    if len(matrix) != len(nodes):
+    if matrix.shape[0] != len(nodes):
         raise ValueError(
             f"The length of '{matrix_path}' does not match the length of '{node_path}'."
         )
@@ -97,15 +111,14 @@ def mat_to_csv(
     # Append ".edges.csv" to the stem path to create the filename
     output_file = generated_dir / f"{stem_path}.edges.csv"
 
-    # Convert the matrix to edges in CSV format
-    edges = [
-        [nodes[i], nodes[j]]
-        for i, row in enumerate(matrix)
-        for j, mark in enumerate(row)
-        if mark == 1
-    ]
-
-    _write_csv_file(output_file, ["source", "target"], edges, csv_delimiter)
+    # Convert the matrix to edges in CSV format. If no node name needs quoting, the edge lines are joined directly
+    # instead of passing every field through the csv writer.
+    if _needs_quoting(nodes, csv_delimiter):
+        edges = _generate_edges(matrix, nodes)
+        _write_csv_file(output_file, ["source", "target"], edges, csv_delimiter)
+    else:
+        edge_lines = _generate_edge_lines(matrix, nodes, csv_delimiter)
+        _write_csv_lines(output_file, ["source", "target"], edge_lines, csv_delimiter)
 
 
 def plant_groups_to_csv(
@@ -142,18 +155,19 @@ def plant_groups_to_csv(
              output directory. The output files' names are created by appending '.nodes.seq.csv' and
              '.groups.nodes.seq.csv' to the stem_path.
     """
-    # Read the plant group information from the file
-    with open(prod_sys_map_path, "r") as f:
-        plant_group_lines = f.readlines()
+    # Read the plant group information from the file to create a dictionary mapping plant group IDs to plant elements
+    plant_group_map = _parse_prodsysmap(prod_sys_map_path)
 
-    # Process the plant group information to create a dictionary mapping plant group IDs to plant elements
-    plant_group_map = _build_plant_group_map(plant_group_lines)
-
-    # Load the plant_group_sequence from the scheduleorder file
-    plant_group_sequence = sio.loadmat(schedule_order_path)["scheduleorder"][0]
+    # Load the plant_group_sequence from the scheduleorder file, converted to Python integers at once so they are not
+    # boxed into NumPy scalars one by one when they are used as dictionary keys and list indices. The IDs are cast to
+    # integers first, as MATLAB saves them as doubles by default. Only the needed variable is read from each .mat file,
+    # any other variables stored in it are skipped without being parsed.
+    schedule_order = sio.loadmat(schedule_order_path, variable_names=["scheduleorder"])
+    plant_group_sequence = schedule_order["scheduleorder"][0].astype(np.int64).tolist()
 
     # Load the partition_info from the groupinfo file
-    partition_info = sio.loadmat(group_info_path)["groupinfo"]
+    group_info = sio.loadmat(group_info_path, variable_names=["groupinfo"])
+    partition_info = group_info["groupinfo"]
 
     # Check if the length of both files matches
     if len(plant_group_map) != len(plant_group_sequence):
@@ -161,17 +175,26 @@ def plant_groups_to_csv(
             f"The length of '{prod_sys_map_path}' does not match the length of '{schedule_order_path}'."
         )
 
-    # Create the ordered lists of node and plant group names based on the plant_group_sequence
-    ordered_node_names = []
-    ordered_plant_group_names = []
-    for plant_group_id in plant_group_sequence:
-        ordered_node_names.extend(plant_group_map[plant_group_id])
-        ordered_plant_group_names.append(plant_group_id)
-
     # Determine the partition IDs (labels)
-    plant_group_partitions = _assign_partition_ids(
-        ordered_plant_group_names, partition_info
-    )
+    plant_group_partitions = _assign_partition_ids(plant_group_sequence, partition_info)
+
+    # Build the partition label of each plant group once, instead of once per row, in a list indexed by plant group ID
+    partition_labels = [
+        f"partition{partition_id}" if partition_id else ""
+        for partition_id in plant_group_partitions.tolist()
+    ]
+
+    # Build the rows of the ordered node names and of the ordered plant group IDs, with their partition IDs (if they
+    # belong to a partition), in a single pass over the plant group sequence
+    node_rows = []
+    group_rows = []
+    for plant_group_id in plant_group_sequence:
+        partition_label = partition_labels[plant_group_id]
+        group_rows.append([f"G{plant_group_id}", partition_label])
+        node_rows.extend(
+            [node_name, partition_label]
+            for node_name in plant_group_map[plant_group_id]
+        )
 
     # Create the output directory if it doesn't exist
     generated_dir = _create_output_directory(output_dir)
@@ -180,26 +203,94 @@ def plant_groups_to_csv(
     output_file_nodes = generated_dir / f"{stem_path}.nodes.seq.csv"
     output_file_groups = generated_dir / f"{stem_path}.groups.nodes.seq.csv"
 
-    # Write the ordered node names and their partition IDs (if they belong to a partition) to a CSV file
-    # with the headers "name;labels"
-    node_rows = []
-    for plant_group_id in ordered_plant_group_names:
-        partition_id = plant_group_partitions.get(plant_group_id, "")
-        partition_label = f"partition{partition_id}" if partition_id else ""
-        for node_name in plant_group_map[plant_group_id]:
-            node_rows.append([node_name, partition_label])
+    # Write the ordered node names and plant group IDs to two CSV files with the headers "name;labels". The rows of
+    # each file are joined into a single string if none of their fields needs quoting.
+    for output_file, rows in (
+        (output_file_nodes, node_rows),
+        (output_file_groups, group_rows),
+    ):
+        if _needs_quoting(chain.from_iterable(rows), csv_delimiter):
+            _write_csv_file(output_file, ["name", "labels"], rows, csv_delimiter)
+        else:
+            lines = [_join_csv_rows(rows, csv_delimiter)]
+            _write_csv_lines(output_file, ["name", "labels"], lines, csv_delimiter)
+
+
+def _generate_edge_blocks(
+    matrix: Union[np.ndarray, csr_matrix], nodes: List[str]
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Generates the edges of a binary DSM matrix as arrays of source and target node names, one pair of arrays per block,
+    in row-major order. A dense matrix is split into blocks of rows, a sparse matrix into blocks of stored elements.
 
-    _write_csv_file(output_file_nodes, ["name", "labels"], node_rows, csv_delimiter)
+    Within a block the marks are located with a single vectorized scan and their row and column indices are mapped to
+    node names with fancy indexing, so only the index and name arrays of one block are held in memory at a time. For a
+    sparse matrix, only its stored elements are scanned.
 
-    # Write the ordered plant group IDs and their partition IDs (if they belong to a partition) to a CSV file
-    # with the headers "name;labels"
-    group_rows = []
-    for plant_group_id in ordered_plant_group_names:
-        partition_id = plant_group_partitions.get(plant_group_id, "")
-        partition_label = f"partition{partition_id}" if partition_id else ""
-        group_rows.append([f"G{plant_group_id}", partition_label])
+    Args:
+        matrix (Union[np.ndarray, csr_matrix]): The binary DSM matrix, dense or in canonical CSR form.
+        nodes (List[str]): The node names, in the order of the matrix rows and columns.
+
+    Returns:
+        Iterator[Tuple[np.ndarray, np.ndarray]]: The source and target node names of the marks in each block.
+    """
+    node_array = np.asarray(nodes, dtype=object)
+
+    # A sparse matrix is processed in blocks of stored elements instead of rows, so its size in memory rather than its
+    # dense size determines the number of blocks. The row of each stored element is found from the row pointers, and
+    # explicitly stored zeros are skipped.
+    if issparse(matrix):
+        for start in range(0, matrix.nnz, _MATRIX_BLOCK_SIZE):
+            stop = min(start + _MATRIX_BLOCK_SIZE, matrix.nnz)
+            positions = np.arange(start, stop)
+            rows = np.searchsorted(matrix.indptr, positions, side="right") - 1
+            cols = matrix.indices[start:stop]
+            marks = matrix.data[start:stop] != 0
+            yield node_array[rows[marks]], node_array[cols[marks]]
+        return
+
+    block_rows = max(1, _MATRIX_BLOCK_SIZE // max(1, len(nodes)))
+    for start in range(0, matrix.shape[0], block_rows):
+        rows, cols = matrix[start : start + block_rows].nonzero()
+        yield node_array[rows + start], node_array[cols]
+
+
+def _generate_edges(
+    matrix: Union[np.ndarray, csr_matrix], nodes: List[str]
+) -> Iterator[Tuple[str, str]]:
+    """
+    Generates the edges of a binary DSM matrix as (source, target) node name pairs, in row-major order.
+
+    Args:
+        matrix (Union[np.ndarray, csr_matrix]): The binary DSM matrix, dense or in canonical CSR form.
+        nodes (List[str]): The node names, in the order of the matrix rows and columns.
+
+    Returns:
+        Iterator[Tuple[str, str]]: The (source, target) node name pairs of the marks in the matrix.
+    """
+    for sources, targets in _generate_edge_blocks(matrix, nodes):
+        yield from zip(sources, targets)
+
+
+def _generate_edge_lines(
+    matrix: Union[np.ndarray, csr_matrix], nodes: List[str], csv_delimiter: str = ";"
+) -> Iterator[str]:
+    """
+    Generates the edges of a binary DSM matrix as CSV lines, in row-major order. The node names must not need quoting.
+
+    Args:
+        matrix (Union[np.ndarray, csr_matrix]): The binary DSM matrix, dense or in canonical CSR form.
+        nodes (List[str]): The node names, in the order of the matrix rows and columns.
+        csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
 
-    _write_csv_file(output_file_groups, ["name", "labels"], group_rows, csv_delimiter)
+    Returns:
+        Iterator[str]: The 'source;target' lines of the marks in the matrix, one string per block.
+    """
+    for sources, targets in _generate_edge_blocks(matrix, nodes):
+        # Concatenate the names of the whole block element-wise, then join the lines into a single string
+        yield "".join(
+            (sources + csv_delimiter + targets + _CSV_LINE_TERMINATOR).tolist()
+        )
 
 
 def _assign_partition_ids(ordered_items, group_info):
@@ -208,26 +299,41 @@ def _assign_partition_ids(ordered_items, group_info):
     a group of items that are processed together in one iteration loop.
 
     Args:
-        ordered_items (list): A list of items ordered by the sequence in which they are processed.
+        ordered_items (list): A list of non-negative integer items ordered by the sequence in which they are
+                              processed.
         group_info (2D list): A list containing the starting indices and sizes of each partition.
 
     Returns:
-        partition_assignments (dict): A dictionary mapping each item in a partition to its partition ID.
+        partition_assignments (np.ndarray): A lookup table indexed by item, holding the partition ID of each item in
+                                            a partition and 0 for all other items.
     """
-    # Convert group_info into a list of (start, end, partition_id) tuples
-    partitions = [
-        (start - 1, start + size - 1, partition_id)
-        for partition_id, (start, size) in enumerate(
-            zip(group_info[0], group_info[1]), start=1
-        )
-    ]
-
-    # Create a dictionary mapping each item to its partition ID
-    partition_assignments = {
-        item: partition_id
-        for start, end, partition_id in partitions
-        for item in ordered_items[start : end + 1]
-    }
+    # Read the 1-based starting indices of the partitions as 0-based signed indices, so arithmetic on them cannot
+    # overflow the small unsigned integer types loadmat may return. Each partition spans the items from its starting
+    # index up to and including its starting index plus its size.
+    starts = np.asarray(group_info[0], dtype=np.intp).ravel() - 1
+    lengths = np.asarray(group_info[1], dtype=np.intp).ravel() + 1
+
+    # Expand the partitions to the position and partition ID of every item they span, in partition order, with a
+    # handful of vectorized calls instead of one slice per partition. Items spanned by more than one partition keep
+    # the ID of the last one.
+    partition_ids = np.repeat(np.arange(1, len(lengths) + 1), lengths)
+    offsets = np.arange(len(partition_ids)) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    positions = np.repeat(starts, lengths) + offsets
+
+    # Ignore positions past the end of the ordered items, as slicing them did
+    in_range = (positions >= 0) & (positions < len(ordered_items))
+
+    # Fill a lookup table indexed by item with the partition IDs. Partition IDs increase in partition order, so
+    # keeping the largest ID of an item keeps the ID of the last partition spanning it.
+    item_array = np.asarray(ordered_items, dtype=np.intp)
+    partition_assignments = np.zeros(item_array.max(initial=-1) + 1, dtype=np.intp)
+    np.maximum.at(
+        partition_assignments,
+        item_array[positions[in_range]],
+        partition_ids[in_range],
+    )
 
     return partition_assignments
 
@@ -235,7 +341,7 @@ def _assign_partition_ids(ordered_items, group_info):
 def _write_csv_file(
     filename: Union[str, Path],
     headers: List[str],
-    rows: List[List[str]],
+    rows: Iterable[Iterable[str]],
     csv_delimiter: str = ";",
 ) -> None:
     """
@@ -244,37 +350,72 @@ def _write_csv_file(
     Args:
         filename (Union[str, Path]): The path to the CSV file.
         headers (List[str]): The column headers for the CSV file.
-        rows (List[List[str]]): The rows of data to write to the CSV file. Each inner list represents a row.
+        rows (Iterable[Iterable[str]]): The rows of data to write to the CSV file. Each inner iterable represents a
+                                        row. The rows are written in a single writerows call.
         csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
     """
-    with open(filename, mode="w", newline="") as f:
+    with open(filename, mode="w", newline="", buffering=_IO_BUFFER_SIZE) as f:
         writer = csv.writer(f, delimiter=csv_delimiter)
         if headers:
             writer.writerow(headers)
         writer.writerows(rows)
 
 
-def _read_csv_file(
-    filename: Union[str, Path], csv_delimiter: str = ";"
-) -> List[Dict[str, str]]:
+def _write_csv_lines(
+    filename: Union[str, Path],
+    headers: List[str],
+    lines: Iterable[str],
+    csv_delimiter: str = ";",
+) -> None:
     """
-    Reads data from a CSV file.
+    Writes already formatted lines to a CSV file, with the same header and line terminator as _write_csv_file.
 
     Args:
         filename (Union[str, Path]): The path to the CSV file.
+        headers (List[str]): The column headers for the CSV file. They must not need quoting.
+        lines (Iterable[str]): The formatted lines to write to the CSV file, each ending with a line terminator.
+        csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
+    """
+    with open(filename, mode="w", newline="", buffering=_IO_BUFFER_SIZE) as f:
+        if headers:
+            f.write(csv_delimiter.join(headers) + _CSV_LINE_TERMINATOR)
+        f.writelines(lines)
+
+
+def _join_csv_rows(rows: Iterable[Iterable[str]], csv_delimiter: str = ";") -> str:
+    """
+    Joins rows into CSV lines, formatted as the csv writer does for fields that do not need quoting.
+
+    Args:
+        rows (Iterable[Iterable[str]]): The rows to join. Each inner iterable represents a row with at least two fields.
         csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
 
     Returns:
-        List[Dict[str, str]]: A list of dictionaries representing the rows in the CSV file. Each dictionary has keys
-        corresponding to the column headers and values corresponding to the values in each column.
+        str: The CSV lines, each ending with a line terminator.
+    """
+    return "".join([csv_delimiter.join(row) + _CSV_LINE_TERMINATOR for row in rows])
+
+
+def _needs_quoting(values: Iterable[str], csv_delimiter: str = ";") -> bool:
     """
-    with open(filename, "r") as f:
-        return list(csv.DictReader(f, delimiter=csv_delimiter))
+    Checks if any of the values would be quoted by the csv writer, because it contains the delimiter, a quote or a
+    line break. Empty values are not checked, as they are only quoted when they are the only field of a row.
+
+    Args:
+        values (Iterable[str]): The values to check.
+        csv_delimiter (str): The csv_delimiter used in the CSV file. Defaults to ';'.
+
+    Returns:
+        bool: True if any of the values needs quoting, False otherwise.
+    """
+    # Search all values at once, as none of the special characters can be formed across the boundary of two values
+    joined = "".join(values)
+    return any(char in joined for char in (csv_delimiter, '"', "\r", "\n"))
 
 
 def _create_output_directory(output_dir: Union[str, Path]) -> Path:
     """
-    Creates the output directory if it doesn't exist.
+    Creates the output directory, and any missing parent directories, if it doesn't exist.
 
     Args:
         output_dir (Union[str, Path]): The path to the directory.
@@ -283,15 +424,28 @@ def _create_output_directory(output_dir: Union[str, Path]) -> Path:
         Path: The path to the directory.
     """
     generated_dir = Path(output_dir)
-    generated_dir.mkdir(exist_ok=True)
+    generated_dir.mkdir(parents=True, exist_ok=True)
     return generated_dir
 
 
-def _build_plant_group_map(plant_group_lines: List[str]) -> Dict[int, List[str]]:
+def _parse_prodsysmap(prod_sys_map_path: Union[str, Path]) -> Dict[int, List[str]]:
+    """
+    Parses a product system map into a dictionary mapping plant group IDs to plant elements. The file is processed line
+    by line, without holding all lines in memory.
+
+    Args:
+        prod_sys_map_path (Union[str, Path]): The path to the product system map. Each line should contain a plant
+                                              group ID prefixed with 'G', followed by a comma-separated list of plant
+                                              elements (node names) belonging to the plant group.
+
+    Returns:
+        Dict[int, List[str]]: A dictionary mapping each plant group ID to the interned names of its plant elements.
+    """
     plant_group_map = {}
-    for line in plant_group_lines:
-        plant_group_data = line.strip().split(",")
-        plant_group_id = int(plant_group_data[0][1:])
-        plant_elements = [elem.strip() for elem in plant_group_data[1:]]
-        plant_group_map[plant_group_id] = plant_elements
+    with open(prod_sys_map_path, "r", buffering=_IO_BUFFER_SIZE) as f:
+        for line in f:
+            plant_group_data = line.strip().split(",")
+            plant_group_id = int(plant_group_data[0][1:])
+            plant_elements = [intern(elem.strip()) for elem in plant_group_data[1:]]
+            plant_group_map[plant_group_id] = plant_elements
     return plant_group_map
@@ -1,12 +1,14 @@
+from pathlib import Path
+
 from opticif import mat_to_csv
 
 # Define input files and directories
-input_dir = "../models/swalmen_tunnel"
-test_matrix = f"{input_dir}/swalmen_tunnel_DSM.mat"
-test_nodes = f"{input_dir}/swalmen_tunnel.groups.nodes.csv"
+input_dir = Path("../models/swalmen_tunnel")
+test_matrix = input_dir / "swalmen_tunnel_DSM.mat"
+test_nodes = input_dir / "swalmen_tunnel.groups.nodes.csv"
 
 # Define output files and directories
-output_dir = f"{input_dir}/generated"
+output_dir = input_dir / "generated"
 output_csv_stem_path = "swalmen_tunnel.groups"
 
 # Define parameters
@@ -1,13 +1,15 @@
+from pathlib import Path
+
 from opticif import plant_groups_to_csv
 
 # Define input files and directories
-input_dir = "../models/swalmen_tunnel"
-test_prod_sys_map = f"{input_dir}/swalmen_tunnel.prodsysmap.txt"
-test_schedule_order = f"{input_dir}/swalmen_tunnel.scheduleorder.mat"
-test_group_info = f"{input_dir}/swalmen_tunnel.groupinfo.mat"
+input_dir = Path("../models/swalmen_tunnel")
+test_prod_sys_map = input_dir / "swalmen_tunnel.prodsysmap.txt"
+test_schedule_order = input_dir / "swalmen_tunnel.scheduleorder.mat"
+test_group_info = input_dir / "swalmen_tunnel.groupinfo.mat"
 
 # Define output files and directories
-output_dir = f"{input_dir}/generated"
+output_dir = input_dir / "generated"
 output_csv_stem_path = "swalmen_tunnel"
 
 # Convert
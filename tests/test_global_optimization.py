@@ -10,25 +10,35 @@ parameters as needed.
 """
 
 import time
+from contextlib import contextmanager
+from pathlib import Path
 
 from opticif import do_global_optimization
 
 # Define input files and directories
-input_dir = "models/swalmen_tunnel"
-test_cif_path = f"{input_dir}/swalmen_tunnel.plants_and_requirements.cif"
-test_sequenced_nodes = f"{input_dir}/generated/swalmen_tunnel.nodes.seq.csv"
+input_dir = Path("models/swalmen_tunnel")
+test_cif_path = input_dir / "swalmen_tunnel.plants_and_requirements.cif"
+test_sequenced_nodes = input_dir / "generated" / "swalmen_tunnel.nodes.seq.csv"
 
 # Define output files and directories
-output_dir = f"{input_dir}/generated"
+output_dir = input_dir / "generated"
 
 # Define parameters
 csv_delimiter = ";"
 
+
+@contextmanager
+def timed(label):
+    """Prints the execution time of the wrapped block."""
+    start_time = time.perf_counter_ns()
+    yield
+    time_elapsed_ms = (time.perf_counter_ns() - start_time) / 1e6
+    print(f"{label} complete. Execution time: {time_elapsed_ms:.2f} milliseconds.")
+
+
 # Perform global optimization
 print("Optimizing: Performing global optimization...")
-start_time = time.time()
-do_global_optimization(test_sequenced_nodes, test_cif_path, output_dir, csv_delimiter)
-end_time = time.time()
-
-time_elapsed_ms = (end_time - start_time) * 1000
-print(f"Optimization complete. Execution time: {time_elapsed_ms:.2f} milliseconds.")
+with timed("Optimization"):
+    do_global_optimization(
+        test_sequenced_nodes, test_cif_path, output_dir, csv_delimiter
+    )
@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from opticif.cif_transformer import do_global_optimization
+
+
+def _automaton(name: str) -> str:
+    return f"plant automaton {name}:\n  location: initial; marked;\nend\n"
+
+
+class TestDoGlobalOptimization(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        self.csv_path = self.temp_dir / "nodes.csv"
+        self.cif_path = self.temp_dir / "spec.cif"
+        self.output_dir = self.temp_dir / "generated"
+
+    def _optimize(self, node_names, cif_text, strict=True):
+        self.csv_path.write_text("name\n" + "".join(f"{n}\n" for n in node_names))
+        self.cif_path.write_text(cif_text)
+        do_global_optimization(
+            self.csv_path, self.cif_path, self.output_dir, strict=strict
+        )
+        return (self.output_dir / "spec.seq.cif").read_text()
+
+    def test_reorders_automata(self):
+        output = self._optimize(
+            ["B", "A"], "event e;\n" + _automaton("A") + _automaton("B")
+        )
+        self.assertEqual(output, "event e;\n" + _automaton("B") + _automaton("A"))
+
+    def test_strict_raises_at_first_duplicate(self):
+        cif_text = "".join(_automaton(name) for name in ["B", "A", "B", "A"])
+        with self.assertRaises(ValueError) as context:
+            self._optimize(["A", "B"], cif_text)
+        self.assertEqual(
+            str(context.exception),
+            "Duplicate plant automaton declaration in the CIF specification: B",
+        )
+
+    def test_non_strict_reports_every_duplicate_sorted(self):
+        cif_text = "".join(_automaton(name) for name in ["C", "B", "A", "C", "A"])
+        with self.assertRaises(ValueError) as context:
+            self._optimize(["A", "B", "C"], cif_text, strict=False)
+        self.assertEqual(
+            str(context.exception),
+            "Duplicate plant automaton declarations in the CIF specification: A, C",
+        )
+
+    def test_unclosed_automaton_raises_syntax_error(self):
+        cif_text = "plant automaton A:\n  location: initial;\n" + _automaton("B")
+        with self.assertRaisesRegex(SyntaxError, "Unclosed automaton detected"):
+            self._optimize(["A", "B"], cif_text)
+
+    def test_missing_nodes_raise_key_error(self):
+        with self.assertRaises(KeyError) as context:
+            self._optimize(["C", "A", "B"], _automaton("A"))
+        self.assertIn(
+            "Nodes not found in the CIF specification: B, C", str(context.exception)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
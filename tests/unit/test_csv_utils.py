@@ -0,0 +1,231 @@
+import csv
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import scipy.io as sio
+from ragraph.graph import Node
+from scipy.sparse import coo_matrix
+
+from opticif.csv_utils import (
+    _assign_partition_ids,
+    _join_csv_rows,
+    _needs_quoting,
+    mat_to_csv,
+    node_to_csv,
+    plant_groups_to_csv,
+)
+
+
+def _write_with_csv_writer(headers, rows, csv_delimiter=";") -> bytes:
+    """Formats the rows as the csv writer does, for comparison with the paths that bypass it."""
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer, delimiter=csv_delimiter)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+class TestNodeToCsv(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def test_creates_nested_output_directory(self):
+        output_dir = self.temp_dir / "a" / "b"
+        node_to_csv([Node("A"), Node("B")], "model", output_dir)
+        self.assertEqual(
+            (output_dir / "model.nodes.seq.csv").read_bytes(),
+            b"name\r\nA\r\nB\r\n",
+        )
+
+    def test_matches_csv_writer(self):
+        cases = {
+            "plain": ["A", "B", "C"],
+            "no nodes": [],
+            "delimiter": ["A", "B;C"],
+            "quote": ['A"B', "C"],
+            "line feed": ["A\nB", "C"],
+            "carriage return": ["A\rB", "C"],
+            "empty single field": ["A", "", "C"],
+            "only an empty field": [""],
+        }
+        for case, node_names in cases.items():
+            with self.subTest(case=case):
+                node_to_csv([Node(name) for name in node_names], case, self.temp_dir)
+                self.assertEqual(
+                    (self.temp_dir / f"{case}.nodes.seq.csv").read_bytes(),
+                    _write_with_csv_writer(["name"], [[name] for name in node_names]),
+                )
+
+
+class TestJoinCsvRows(unittest.TestCase):
+    def test_matches_csv_writer_when_no_field_needs_quoting(self):
+        rows = [["A", "partition1"], ["B", ""], ["G10", "partition12"], ["", ""]]
+        self.assertFalse(_needs_quoting(field for row in rows for field in row))
+        self.assertEqual(
+            ("name;labels\r\n" + _join_csv_rows(rows)).encode(),
+            _write_with_csv_writer(["name", "labels"], rows),
+        )
+
+    def test_needs_quoting_detects_every_field_the_csv_writer_quotes(self):
+        for value in ["A;B", 'A"B', "A\nB", "A\rB", ";", '"']:
+            with self.subTest(value=value):
+                self.assertTrue(_needs_quoting(["C", value]))
+                self.assertNotEqual(
+                    _write_with_csv_writer(["name", "labels"], [["C", value]]),
+                    ("name;labels\r\n" + _join_csv_rows([["C", value]])).encode(),
+                )
+
+    def test_needs_quoting_ignores_plain_and_empty_values(self):
+        self.assertFalse(_needs_quoting(["A", "", "B_C", "D E"]))
+        self.assertFalse(_needs_quoting([]))
+        self.assertTrue(_needs_quoting(["A,B"], csv_delimiter=","))
+
+
+class TestMatToCsv(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def _convert(self, matrix, node_names, stem_path):
+        node_path = self.temp_dir / f"{stem_path}.csv"
+        matrix_path = self.temp_dir / f"{stem_path}.mat"
+        quoted_names = ['"' + name.replace('"', '""') + '"' for name in node_names]
+        node_path.write_text("name\n" + "".join(f"{name}\n" for name in quoted_names))
+        sio.savemat(matrix_path, {"matrix": matrix})
+        mat_to_csv(matrix_path, node_path, stem_path, self.temp_dir)
+        return (self.temp_dir / f"{stem_path}.edges.csv").read_bytes()
+
+    def test_sparse_matrix_matches_dense_matrix(self):
+        dense = np.array(
+            [
+                [0, 1, 0, 1],
+                [0, 0, 0, 0],
+                [1, 1, 0, 0],
+                [0, 0, 1, 1],
+            ],
+            dtype=np.float64,
+        )
+        # Unsorted COO entries with explicitly stored zeros and a mark stored as 1 + 0 in two duplicate entries
+        rows = [3, 2, 0, 1, 3, 0, 2, 3, 1, 2]
+        cols = [3, 0, 3, 1, 2, 1, 1, 2, 3, 2]
+        data = [1, 1, 1, 0, 1, 1, 1, 0, 0, 0]
+        sparse = coo_matrix((data, (rows, cols)), shape=(4, 4), dtype=np.float64)
+        self.assertFalse(sparse.has_canonical_format)
+        np.testing.assert_array_equal(sparse.toarray(), dense)
+
+        for node_names in [["A", "B", "C", "D"], ["A;1", "B", 'C"2', "D"]]:
+            # Small blocks also exercise the block boundaries of both paths
+            for block_size in [1 << 20, 3]:
+                with self.subTest(node_names=node_names, block_size=block_size):
+                    with mock.patch("opticif.csv_utils._MATRIX_BLOCK_SIZE", block_size):
+                        dense_edges = self._convert(dense, node_names, "dense")
+                        sparse_edges = self._convert(sparse, node_names, "sparse")
+                    self.assertEqual(sparse_edges, dense_edges)
+
+        self.assertEqual(
+            dense_edges,
+            b'source;target\r\n"A;1";B\r\n"A;1";D\r\n"C""2";"A;1"\r\n"C""2";B\r\n'
+            b'D;"C""2"\r\nD;D\r\n',
+        )
+
+
+class TestPlantGroupsToCsv(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        self.prod_sys_map_path = self.temp_dir / "model.prodsysmap.txt"
+        self.prod_sys_map_path.write_text("G1,A,B\nG2,C\nG3,D,E\n")
+        self.group_info_path = self.temp_dir / "model.groupinfo.mat"
+        sio.savemat(self.group_info_path, {"groupinfo": np.array([[1.0], [1.0]])})
+
+    def test_writes_integer_plant_group_ids_for_every_schedule_order_dtype(self):
+        for dtype in [np.float64, np.uint8]:
+            with self.subTest(dtype=dtype):
+                schedule_order_path = self.temp_dir / f"{dtype.__name__}.mat"
+                sio.savemat(
+                    schedule_order_path,
+                    {"scheduleorder": np.array([[2, 3, 1]], dtype=dtype)},
+                )
+                stem_path = dtype.__name__
+                plant_groups_to_csv(
+                    self.prod_sys_map_path,
+                    schedule_order_path,
+                    self.group_info_path,
+                    stem_path,
+                    self.temp_dir,
+                )
+                self.assertEqual(
+                    (self.temp_dir / f"{stem_path}.nodes.seq.csv").read_bytes(),
+                    b"name;labels\r\nC;partition1\r\nD;partition1\r\nE;partition1\r\n"
+                    b"A;\r\nB;\r\n",
+                )
+                self.assertEqual(
+                    (self.temp_dir / f"{stem_path}.groups.nodes.seq.csv").read_bytes(),
+                    b"name;labels\r\nG2;partition1\r\nG3;partition1\r\nG1;\r\n",
+                )
+
+
+def _assign_partition_ids_by_slicing(ordered_items, group_info):
+    """Assigns partition IDs with one list slice per partition, as _assign_partition_ids originally did."""
+    return {
+        item: partition_id
+        for partition_id, (start, size) in enumerate(
+            zip(group_info[0], group_info[1]), start=1
+        )
+        for item in ordered_items[start - 1 : start + size]
+    }
+
+
+class TestAssignPartitionIds(unittest.TestCase):
+    def assertMatchesSlicing(self, ordered_items, group_info):
+        expected = _assign_partition_ids_by_slicing(ordered_items, group_info)
+        partition_assignments = _assign_partition_ids(ordered_items, group_info)
+        self.assertEqual(
+            {
+                item: partition_id
+                for item, partition_id in enumerate(partition_assignments.tolist())
+                if partition_id
+            },
+            expected,
+        )
+
+    def test_overlapping_partitions_keep_the_last_partition(self):
+        ordered_items = [5, 3, 8, 1, 2, 7, 4, 6]
+        group_info = np.array([[2, 3, 1, 6], [2, 4, 0, 1]])
+        self.assertMatchesSlicing(ordered_items, group_info)
+        self.assertEqual(
+            _assign_partition_ids(ordered_items, group_info).tolist(),
+            [0, 2, 2, 1, 4, 3, 0, 4, 2],
+        )
+
+    def test_out_of_range_partitions_are_clipped(self):
+        ordered_items = [4, 2, 3, 1]
+        group_info = np.array([[3, 6, 4], [5, 1, 0]], dtype=np.uint8)
+        self.assertMatchesSlicing(ordered_items, group_info)
+
+    def test_random_partitions_match_slicing(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            n_items = int(rng.integers(0, 30))
+            n_partitions = int(rng.integers(0, 6))
+            ordered_items = rng.permutation(np.arange(1, n_items + 1)).tolist()
+            group_info = np.array(
+                [
+                    rng.integers(1, n_items + 4, n_partitions),
+                    rng.integers(0, 8, n_partitions),
+                ]
+            )
+            with self.subTest(ordered_items=ordered_items, group_info=group_info):
+                self.assertMatchesSlicing(ordered_items, group_info)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import scipy.io as sio
+
+from opticif._validators import (
+    CSVStructureError,
+    MATStructureError,
+    _read_and_validate_node_csv_cached,
+    load_matrix,
+    read_and_validate_node_csv,
+    validate_matrix_file_structure,
+)
+
+
+class TestReadAndValidateNodeCsv(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.csv_path = Path(temp_dir.name) / "nodes.csv"
+
+    def test_reads_single_column_with_crlf_line_endings(self):
+        self.csv_path.write_bytes(b"name\r\nA\r\nB\r\n\r\nC\r\n")
+        self.assertEqual(
+            read_and_validate_node_csv(self.csv_path), (["A", "B", "C"], None)
+        )
+
+    def test_reads_single_column_with_quoted_line_break(self):
+        self.csv_path.write_bytes(b'name\r\nA\r\n"B\r\nC"\r\n')
+        self.assertEqual(
+            read_and_validate_node_csv(self.csv_path), (["A", "B\nC"], None)
+        )
+
+    def test_reads_labels_with_crlf_line_endings(self):
+        self.csv_path.write_bytes(b"name;labels\r\nA;x\r\nB;x\r\nC;\r\n")
+        self.assertEqual(
+            read_and_validate_node_csv(self.csv_path),
+            (["A", "B", "C"], ["x", "x", ""]),
+        )
+
+    def test_returned_lists_do_not_affect_later_reads(self):
+        self.csv_path.write_text("name;labels\nA;x\nB;x\n")
+        names, labels = read_and_validate_node_csv(self.csv_path)
+        names.append("C")
+        labels.clear()
+        self.assertEqual(
+            read_and_validate_node_csv(self.csv_path), (["A", "B"], ["x", "x"])
+        )
+
+    def test_caches_file_once_for_every_path_form(self):
+        self.csv_path.write_text("name\nA\n")
+        _read_and_validate_node_csv_cached.cache_clear()
+        read_and_validate_node_csv(self.csv_path)
+        read_and_validate_node_csv(str(self.csv_path))
+        read_and_validate_node_csv(f"{self.csv_path.parent}/./nodes.csv")
+        cache_info = _read_and_validate_node_csv_cached.cache_info()
+        self.assertEqual((cache_info.misses, cache_info.hits), (1, 2))
+
+    def test_rereads_edited_file(self):
+        self.csv_path.write_text("name\nA\n")
+        read_and_validate_node_csv(self.csv_path)
+        stat = self.csv_path.stat()
+        self.csv_path.write_text("name\nA\nB\n")
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(read_and_validate_node_csv(self.csv_path), (["A", "B"], None))
+
+    def test_error_messages_name_the_path_given_by_the_caller(self):
+        self.csv_path.write_text("name\nA\nA\n")
+        for csv_path in [self.csv_path, f"{self.csv_path.parent}/./nodes.csv"]:
+            with self.subTest(csv_path=csv_path):
+                with self.assertRaises(CSVStructureError) as context:
+                    read_and_validate_node_csv(csv_path)
+                self.assertEqual(
+                    str(context.exception),
+                    f"'{csv_path}' should not have duplicate values in the 'name' column. "
+                    f"Found duplicates: A",
+                )
+
+
+class TestValidateMatrixFileStructure(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def _save_matrix(self, matrix: np.ndarray, name: str = "matrix") -> Path:
+        matrix_path = self.temp_dir / f"{name}.mat"
+        sio.savemat(matrix_path, {"matrix": matrix})
+        return matrix_path
+
+    def test_rejects_non_binary_floats(self):
+        for i, value in enumerate([0.5, -1.0, np.nan, 2.0]):
+            with self.subTest(value=value):
+                matrix = np.eye(3, dtype=np.float64)
+                matrix[1, 2] = value
+                matrix_path = self._save_matrix(matrix, f"float{i}")
+                with self.assertRaisesRegex(
+                    MATStructureError, "is not binary.*at row 2, column 3"
+                ):
+                    validate_matrix_file_structure(matrix_path)
+
+    def test_rejects_non_binary_integers(self):
+        for dtype in [np.int8, np.int32, np.int64]:
+            for value in [-1, 2]:
+                with self.subTest(dtype=dtype, value=value):
+                    matrix = np.eye(3, dtype=dtype)
+                    matrix[1, 2] = value
+                    matrix_path = self._save_matrix(matrix, f"{dtype.__name__}{value}")
+                    with self.assertRaisesRegex(
+                        MATStructureError, f"Found '{value}' at row 2, column 3"
+                    ):
+                        validate_matrix_file_structure(matrix_path)
+
+    def test_rejects_integers_that_wrap_to_binary_in_uint8(self):
+        matrix = np.eye(3, dtype=np.int64)
+        matrix[1, 2] = 257
+        with self.assertRaisesRegex(MATStructureError, "Found '257'"):
+            validate_matrix_file_structure(self._save_matrix(matrix))
+
+    def test_accepts_binary_matrices(self):
+        for dtype in [np.float64, np.int64, np.uint8]:
+            with self.subTest(dtype=dtype):
+                matrix = np.eye(3, dtype=dtype)
+                matrix[0, 2] = 1
+                validate_matrix_file_structure(
+                    self._save_matrix(matrix, dtype.__name__)
+                )
+
+    def test_accepts_boolean_matrix(self):
+        # savemat stores booleans as uint8, so a boolean matrix can only come from loadmat itself
+        matrix_path = self._save_matrix(np.eye(3))
+        with mock.patch(
+            "opticif._validators.loadmat",
+            return_value={"matrix": np.eye(3, dtype=np.bool_)},
+        ):
+            validate_matrix_file_structure(matrix_path)
+
+    def test_rejects_non_square_matrix(self):
+        with self.assertRaisesRegex(MATStructureError, "is not square"):
+            validate_matrix_file_structure(self._save_matrix(np.ones((2, 3))))
+
+
+class TestLoadMatrix(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.matrix_path = Path(temp_dir.name) / "matrix.mat"
+
+    def test_returns_read_only_shared_matrix(self):
+        sio.savemat(self.matrix_path, {"matrix": np.eye(3)})
+        matrix = load_matrix(self.matrix_path)
+        self.assertIs(load_matrix(str(self.matrix_path)), matrix)
+        with self.assertRaises(ValueError):
+            matrix[0, 0] = 0
+
+    def test_reloads_rewritten_file(self):
+        sio.savemat(self.matrix_path, {"matrix": np.eye(3)})
+        load_matrix(self.matrix_path)
+        stat = self.matrix_path.stat()
+
+        sio.savemat(self.matrix_path, {"matrix": np.ones((3, 3))})
+        os.utime(self.matrix_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        np.testing.assert_array_equal(load_matrix(self.matrix_path), np.ones((3, 3)))
+
+    def test_reloads_file_replaced_with_preserved_modification_time(self):
+        sio.savemat(self.matrix_path, {"matrix": np.eye(3)})
+        load_matrix(self.matrix_path)
+        stat = self.matrix_path.stat()
+
+        sio.savemat(self.matrix_path, {"matrix": np.eye(4)})
+        os.utime(self.matrix_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertNotEqual(self.matrix_path.stat().st_size, stat.st_size)
+        np.testing.assert_array_equal(load_matrix(self.matrix_path), np.eye(4))
+
+
+if __name__ == "__main__":
+    unittest.main()